@@ -13,7 +13,9 @@ Requisitos
 ----------
 - Python 3.8+
 - ffmpeg instalado y accesible en PATH (recomendado para conversión AVIF/webp y videos)
-- Pillow (pip install pillow) — usado como fallback para WebP si ffmpeg no está
+- Pillow (pip install pillow) — usado como fallback para WebP si ffmpeg no está y para el formato 'original'
+- jpegtran para la variante 'original' de JPEG a tamaño completo (sin él no se genera: sería con pérdida)
+- Opcional: oxipng (mejor recompresión PNG)
 
 Limitaciones
 -----------
@@ -22,13 +24,21 @@ Limitaciones
 
 Uso básico
 ---------
-python optimizador_assets_web.py --input ./static --output ./static_optimized --formats webp,avif --sizes 320,640,1280 --report report.json
+python optimizador_assets_web.py --input ./static --output ./static_optimized --formats webp,avif,original --sizes 320,640,1280 --report report.json
 
 Salida
 -----
 - Directorio de salida con la misma estructura que la entrada y assets optimizados.
 - report.json con metadatos y ahorro por archivo.
 - snippets.html con ejemplos de <img> y <video> optimizados y srcset.
+- Con el formato 'original', una copia JPEG/PNG reoptimizada sin pérdida (Huffman optimizado y
+  progresivo, paleta cuando es exacta, sin EXIF) que sirve de fallback para navegadores sin WebP/AVIF.
+- Con --video-mode hls (o both), por cada video una carpeta <nombre>_hls con una escalera
+  de rendiciones HLS (fMP4 o TS) con keyframes alineados, master.m3u8 y poster.jpg.
+- Con --html-dir, copia reescrita de las páginas HTML que usan <picture>/srcset/sizes (según el
+  ancho con el que la página muestra cada imagen),
+  width/height intrínsecos y hints de carga (lazy, fetchpriority, preload). Si se guardan en otro
+  directorio, las URLs relativas (CSS, scripts, links, srcset, url(...)) se recalculan para que sigan resolviendo.
 
 """
 
@@ -40,16 +50,20 @@ import shutil
 import subprocess
 import sys
 import json
+import re
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, urlunsplit, unquote, quote
 
 # Importamos la instancia de Image (imagen) de Pillow (PIL)
 try:
-    from PIL import Image 
+    from PIL import Image, ImageChops, ImageOps
 except Exception:
-    Image = None 
+    Image = ImageChops = ImageOps = None
 
 # Barra de carga opcional (tqdm). Si no está instalado, el script sigue funcionando y usa prints simples.
 try:
@@ -64,6 +78,20 @@ except ImportError:
 
 IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'}
 VIDEO_EXTS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv'}
+HTML_EXTS = {'.html', '.htm'}
+# Atributos con URLs que hay que recalcular cuando la página reescrita se guarda en otro directorio
+ATRIBUTOS_URL = {'src', 'href', 'poster', 'action', 'formaction', 'cite', 'data', 'background', 'srcset', 'imagesrcset', 'style'}
+
+# Tipos MIME de las variantes, en orden de preferencia para los <source> de <picture>
+MIME_IMAGENES = {'avif': 'image/avif', 'webp': 'image/webp'}
+MIME_VIDEOS = {'hls': 'application/vnd.apple.mpegurl', 'webm': 'video/webm', 'mp4': 'video/mp4'}
+
+# Escalera HLS por defecto: (alto, kbps de video)
+HLS_LADDER = '1080:5000,720:2800,480:1400,360:800'
+HLS_AUDIO_KBPS = 128
+# Timeout automático por rendición: segundos de codificación por segundo de video (con un mínimo)
+HLS_TIMEOUT_POR_SEGUNDO = 10
+HLS_TIMEOUT_MINIMO = 600
 
 @dataclass
 class VarianteOptimizada: # Inicializamos la clase de la variante del archivo optimizada, para tipado.
@@ -77,6 +105,9 @@ class ReporteAssets: # Inicializamos la clase que se usará para el reporte fina
     original_path: str
     original_size: int
     variants: List[VarianteOptimizada]
+    width: Optional[int] = None # Dimensiones intrínsecas del original (para width/height en el HTML)
+    height: Optional[int] = None
+    poster: Optional[str] = None # Frame del video usado como poster (solo en modo HLS)
 
 
 def encontrar_assets(root: Path) -> Tuple[List[Path], List[Path]]: # Definimos la función que rastrea y almacena las direcciones de los assets que queremos convertir
@@ -121,6 +152,33 @@ def ffmpeg_disponible() -> bool: # Definimos la función que nos indica si ffmpe
     return shutil.which('ffmpeg') is not None
 
 
+def obtener_dimensiones(src: Path) -> Tuple[Optional[int], Optional[int]]: # Definimos la función que lee el ancho y alto con los que se muestra el asset
+    w = h = orient = None
+    if Image is not None and src.suffix.lower() in IMAGE_EXTS:
+        try:
+            with Image.open(src) as im:
+                w, h = im.width, im.height
+                orient = im.getexif().get(0x0112)
+        except Exception:
+            pass
+    # ffprobe sirve tanto para videos como para imágenes que Pillow no pueda abrir
+    if w is None and shutil.which('ffprobe') is not None:
+        cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=width,height', '-of', 'csv=s=x:p=0', str(src)]
+        try:
+            out = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=30).stdout.strip()
+            w, h = (int(x) for x in out.splitlines()[0].split('x')[:2])
+        except Exception:
+            return None, None
+    if w is None:
+        return None, None
+    if orient is None and src.suffix.lower() in ('.jpg', '.jpeg'):
+        orient = orientacion_exif(src)
+    # Orientaciones EXIF 5 a 8 rotan 90°: el navegador (y las variantes) muestran la imagen con ancho y alto invertidos
+    if orient in (5, 6, 7, 8):
+        w, h = h, w
+    return w, h
+
+
 def conv_im_c_ffmpeg(src: Path, dest: Path, width: Optional[int], fmt: str) -> bool: # Definimos la función para convertir imagenes con FFMPEG
     # Escalado de ffmpeg: Mantiene la relación de aspecto (-1 de altura)
     cmd = ['ffmpeg', '-y', '-i', str(src)]
@@ -150,6 +208,8 @@ def conv_im_c_pillow(src: Path, dest: Path, width: Optional[int], fmt: str) -> b
         return False
     try:
         with Image.open(src) as im:
+            # Se aplica la orientación EXIF para que la variante coincida con las dimensiones del reporte
+            im = ImageOps.exif_transpose(im)
             # convertir PNG/GIF a RGB para formatos web
             if im.mode in ('P', 'RGBA') and fmt.lower() in ('jpeg', 'jpg'):
                 im = im.convert('RGB')
@@ -167,6 +227,170 @@ def conv_im_c_pillow(src: Path, dest: Path, width: Optional[int], fmt: str) -> b
         return False
 
 
+# Transformación de jpegtran que deja los píxeles derechos para cada orientación EXIF
+TRANSFORMACIONES_JPEGTRAN = {
+    1: [], 2: ['-flip', 'horizontal'], 3: ['-rotate', '180'], 4: ['-flip', 'vertical'],
+    5: ['-transpose'], 6: ['-rotate', '90'], 7: ['-transverse'], 8: ['-rotate', '270'],
+}
+
+
+def orientacion_tiff(tiff: bytes) -> Optional[int]: # Definimos la función que busca el tag Orientation (0x0112) en el IFD0 de un bloque EXIF
+    endian = {b'II': 'little', b'MM': 'big'}.get(tiff[:2])
+    if endian is None or len(tiff) < 8:
+        return None
+    off = int.from_bytes(tiff[4:8], endian)
+    if off + 2 > len(tiff):
+        return None
+    for k in range(int.from_bytes(tiff[off:off + 2], endian)):
+        e = off + 2 + 12 * k
+        if e + 12 > len(tiff):
+            return None
+        if int.from_bytes(tiff[e:e + 2], endian) == 0x0112:
+            v = int.from_bytes(tiff[e + 8:e + 10], endian)
+            return v if v in TRANSFORMACIONES_JPEGTRAN else None
+    return 1
+
+
+def orientacion_exif(src: Path) -> Optional[int]: # Definimos la función que lee la orientación EXIF de un JPEG sin depender de Pillow (1 si no hay EXIF, None si no se puede leer)
+    try:
+        with open(src, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            while True:
+                head = f.read(2)
+                if len(head) < 2 or head[0] != 0xFF:
+                    return None
+                if head[1] == 0xFF:  # bytes de relleno entre marcadores
+                    f.seek(-1, 1)
+                    continue
+                if head[1] in (0xD9, 0xDA):  # fin de imagen / inicio de datos: no hay más metadata
+                    return 1
+                seg_len = int.from_bytes(f.read(2), 'big')
+                if head[1] == 0xE1:
+                    seg = f.read(seg_len - 2)
+                    if seg[:6] == b'Exif\x00\x00':
+                        return orientacion_tiff(seg[6:])
+                else:
+                    f.seek(seg_len - 2, 1)
+    except OSError:
+        return None
+
+
+def reoptimizar_jpeg(src: Path, dest: Path) -> bool: # Definimos la función que reoptimiza un JPEG sin pérdida (Huffman optimizado + progresivo)
+    # Solo jpegtran es lossless (reescribe los coeficientes DCT tal cual). Pillow decodificaría y recodificaría,
+    # sumando otra generación de error, así que sin jpegtran no se genera esta variante.
+    if shutil.which('jpegtran') is None:
+        return False
+    orient = orientacion_exif(src)
+    if orient is None:
+        return False
+    # La metadata se descarta (-copy icc conserva solo el perfil de color), así que la orientación
+    # se aplica a los píxeles. -perfect hace fallar la rotación si no puede ser lossless en los bordes.
+    cmd = ['jpegtran', '-copy', 'icc', '-optimize', '-progressive'] + TRANSFORMACIONES_JPEGTRAN[orient]
+    if orient != 1:
+        cmd.append('-perfect')
+    cmd += ['-outfile', str(dest), str(src)]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        return True
+    except Exception:
+        if dest.exists():
+            try:
+                dest.unlink()
+            except Exception:
+                pass
+        return False
+
+
+def png_fuera_de_pillow(src: Path) -> bool: # Definimos la función que indica si Pillow no puede reescribir el PNG sin pérdida (16 bits por canal o animado)
+    try:
+        with open(src, 'rb') as f:
+            cabecera = f.read(33)
+        # Firma (8) + largo (4) + 'IHDR' (4) + ancho (4) + alto (4) -> byte 24 = profundidad de bits
+        if cabecera[12:16] == b'IHDR' and cabecera[24] == 16:
+            return True
+        with Image.open(src) as im:
+            return bool(getattr(im, 'is_animated', False))
+    except Exception:
+        return True
+
+
+def oxipng_solo(src: Path, dest: Path) -> bool: # Definimos la función que recomprime el PNG solo con oxipng (lossless para cualquier profundidad y APNG)
+    if shutil.which('oxipng') is None:
+        return False
+    try:
+        subprocess.run(['oxipng', '-q', '-o', '2', '--strip', 'safe', '--out', str(dest), str(src)], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+        return dest.exists()
+    except Exception:
+        return False
+
+
+def reoptimizar_png(src: Path, dest: Path) -> bool: # Definimos la función que recomprime un PNG sin pérdida, pasando a paleta si tiene pocos colores
+    if Image is None:
+        return False
+    if png_fuera_de_pillow(src):
+        # Pillow lo bajaría a 8 bits o se quedaría con el primer frame: solo oxipng, o ninguna variante
+        return oxipng_solo(src, dest)
+    try:
+        with Image.open(src) as im:
+            im.load()
+            params = {'optimize': True}
+            if im.info.get('icc_profile'):
+                params['icc_profile'] = im.info['icc_profile']
+            # La metadata no se copia: una orientación EXIF se aplica a los píxeles (en PNG es lossless)
+            out = im = ImageOps.exif_transpose(im)
+            if im.mode == 'RGB' and 'transparency' in im.info:
+                # Color transparente por tRNS: se pasa a RGBA para que la paleta lleve el alfa y no se pierda
+                out = im = im.convert('RGBA')
+            if im.mode in ('RGB', 'RGBA') and im.getcolors(256) is not None:
+                # Con 256 colores o menos la paleta debería ser exacta; se verifica antes de usarla
+                pal = im.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+                diff = ImageChops.difference(pal.convert(im.mode), im)
+                if all(hi == 0 for _, hi in diff.getextrema()):
+                    out = pal
+            if out.mode in ('RGB', 'RGBA'):
+                out.info.pop('transparency', None)
+            out.save(dest, format='PNG', **params)
+    except Exception:
+        return False
+    if shutil.which('oxipng') is not None:
+        # oxipng prueba más filtros/niveles de deflate que Pillow; si falla se conserva lo de Pillow
+        try:
+            subprocess.run(['oxipng', '-q', '-o', '2', '--strip', 'safe', str(dest)], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+        except Exception:
+            pass
+    return True
+
+
+def reoptimizar_original(src: Path, dest: Path, width: Optional[int]) -> bool: # Definimos la función de la variante 'original': mismo formato que la fuente, más liviana
+    ext = src.suffix.lower()
+    if ext not in ('.jpg', '.jpeg', '.png'):
+        return False
+    if width is None:
+        return reoptimizar_jpeg(src, dest) if ext in ('.jpg', '.jpeg') else reoptimizar_png(src, dest)
+    # Tamaños responsive del fallback: ya hay que recodificar, así que JPEG va con pérdida (q82) y PNG sigue lossless
+    if Image is None or (ext == '.png' and png_fuera_de_pillow(src)):
+        return False
+    try:
+        with Image.open(src) as im:
+            params = {'optimize': True}
+            if im.info.get('icc_profile'):
+                params['icc_profile'] = im.info['icc_profile']
+            # Sin EXIF en la salida: la orientación se aplica a los píxeles antes de escalar
+            im = ImageOps.exif_transpose(im)
+            if im.width <= width:
+                return False
+            height = round((width / im.width) * im.height)
+            resized = im.resize((width, height), Image.LANCZOS)
+            if ext == '.png':
+                resized.save(dest, format='PNG', **params)
+            else:
+                resized.convert('RGB').save(dest, format='JPEG', quality=82, progressive=True, **params)
+        return True
+    except Exception:
+        return False
+
+
 def crear_output_path(input_root: Path, output_root: Path, src: Path, suffix: str, ext: str) -> Path: # Definimos la función que crea el directorio de salida de
     rel = src.relative_to(input_root)
     out = output_root / rel.parent / (rel.stem + suffix + ext)
@@ -180,12 +404,17 @@ def gen_var_im(input_root: Path, output_root: Path, src: Path, formats: List[str
 
     for w in widths:
         for fmt in formats:
-            ext = f'.{fmt.lower()}'
+            ext = src.suffix.lower() if fmt.lower() == 'original' else f'.{fmt.lower()}'
             suffix = f'.w{w}' if w else ''
             out = crear_output_path(input_root, output_root, src, suffix, ext)
+            if out.resolve() == src.resolve():
+                out = crear_output_path(input_root, output_root, src, suffix + '.opt', ext)
             asegurar_dir(out)
             success = False
-            if use_ffmpeg:
+            if fmt.lower() == 'original':
+                # Pasada barata en el formato de la fuente: fallback para navegadores sin WebP/AVIF
+                success = reoptimizar_original(src, out, w)
+            elif use_ffmpeg:
                 success = conv_im_c_ffmpeg(src, out, w, fmt)
             if not success:
                 # Prueba el fallback de pillow para webp
@@ -201,8 +430,37 @@ def gen_var_im(input_root: Path, output_root: Path, src: Path, formats: List[str
                         pass
                 else:
                     variants.append(VarianteOptimizada(path=str(out), format=fmt, width=w, size=vsize))
-    return ReporteAssets(original_path=str(src), original_size=orig_size, variants=variants)
+    width, height = obtener_dimensiones(src)
+    return ReporteAssets(original_path=str(src), original_size=orig_size, variants=variants, width=width, height=height)
+
+
+
+def ejecutar_ffmpeg(cmd: List[str], src: Path, timeout: int) -> bool: # Definimos la función que corre ffmpeg con timeout, matando el proceso (y sus hijos) si se excede
+    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"⚠️ Conversión de {src} cancelada por exceder {timeout} segundos. Intentando detener proceso...")
+
+        # Intentar terminar proceso y sus hijos
+        if psutil:
+            killed = terminar_peh(process.pid)
+            if not killed:
+                process.terminate()
+                time.sleep(3)
+                if process.poll() is None:
+                    process.kill()
+        else:
+            process.terminate()
+            time.sleep(3)
+            if process.poll() is None:
+                process.kill()
 
+        process.communicate()  # Liberar recursos
+        return False
+
+    return process.returncode == 0
 
 
 def conv_vid_c_ffmpeg(src: Path, dest: Path, preset: str, target_crf: int = None, timeout: int = 60) -> bool:
@@ -231,29 +489,7 @@ def conv_vid_c_ffmpeg(src: Path, dest: Path, preset: str, target_crf: int = None
 
     cmd.append(str(dest))
 
-    process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-    try:
-        process.wait(timeout=timeout)
-    except subprocess.TimeoutExpired:
-        print(f"⚠️ Conversión de {src} cancelada por exceder {timeout} segundos. Intentando detener proceso...")
-
-        # Intentar terminar proceso y sus hijos
-        if psutil:
-            killed = terminar_peh(process.pid)
-            if not killed:
-                process.terminate()
-                time.sleep(3)
-                if process.poll() is None:
-                    process.kill()
-        else:
-            process.terminate()
-            time.sleep(3)
-            if process.poll() is None:
-                process.kill()
-
-        process.communicate()  # Liberar recursos
-
+    if not ejecutar_ffmpeg(cmd, src, timeout):
         if dest.exists():
             try:
                 dest.unlink()
@@ -261,15 +497,7 @@ def conv_vid_c_ffmpeg(src: Path, dest: Path, preset: str, target_crf: int = None
                 print(f"⚠️ No se pudo borrar archivo parcial {dest}: {e}")
         return False
 
-    if process.returncode == 0 and dest.exists():
-        return True
-    else:
-        if dest.exists():
-            try:
-                dest.unlink()
-            except Exception:
-                pass
-        return False
+    return dest.exists()
 
 
 def generar_vid_var(input_root: Path, output_root: Path, src: Path, presets: List[Tuple[str, str]], keep_larger: bool = False) -> "ReporteAssets":
@@ -350,10 +578,142 @@ def generar_vid_var(input_root: Path, output_root: Path, src: Path, presets: Lis
     # Filtra variantes para dejar solo la final en el reporte
     variants = [v for v in variants if v.format == final_format]
 
-    return ReporteAssets(original_path=str(src), original_size=orig_size, variants=variants)
+    width, height = obtener_dimensiones(src)
+    return ReporteAssets(original_path=str(src), original_size=orig_size, variants=variants, width=width, height=height)
+
+
+def obtener_duracion(src: Path) -> Optional[float]: # Definimos la función que lee la duración del video en segundos
+    if shutil.which('ffprobe') is None:
+        return None
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(src)]
+    try:
+        return float(subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=30).stdout.strip())
+    except Exception:
+        return None
+
+
+def tiene_audio(src: Path) -> bool: # Definimos la función que indica si el video tiene al menos una pista de audio
+    if shutil.which('ffprobe') is None:
+        return False
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'a', '-show_entries', 'stream=index', '-of', 'csv=p=0', str(src)]
+    try:
+        return bool(subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=30).stdout.strip())
+    except Exception:
+        return False
+
 
+def conv_rendicion_hls(src: Path, out_dir: Path, name: str, height: int, kbps: int, segment_type: str, segment_time: int, timeout: int) -> bool: # Definimos la función que codifica un escalón de la escalera HLS
+    playlist = out_dir / f"{name}.m3u8"
+    seg_ext = 'm4s' if segment_type == 'fmp4' else 'ts'
+    cmd = ['ffmpeg', '-y', '-i', str(src), '-map', '0:v:0', '-map', '0:a:0?',
+           '-vf', f"scale=-2:{height}",
+           '-c:v', 'libx264', '-preset', 'medium', '-profile:v', 'main', '-level', '4.0', '-pix_fmt', 'yuv420p',
+           '-b:v', f"{kbps}k", '-maxrate', f"{int(kbps * 1.07)}k", '-bufsize', f"{int(kbps * 1.5)}k",
+           # Keyframes forzados cada segment_time segundos y sin cortes por cambio de escena:
+           # así todos los escalones cortan los segmentos en los mismos instantes y el player puede cambiar de calidad.
+           '-force_key_frames', f"expr:gte(t,n_forced*{segment_time})", '-sc_threshold', '0',
+           '-c:a', 'aac', '-b:a', f"{HLS_AUDIO_KBPS}k", '-ac', '2',
+           '-f', 'hls', '-hls_time', str(segment_time), '-hls_playlist_type', 'vod',
+           '-hls_segment_type', segment_type,
+           '-hls_segment_filename', str(out_dir / f"{name}_%04d.{seg_ext}")]
+    if segment_type == 'fmp4':
+        cmd += ['-hls_fmp4_init_filename', f"{name}_init.mp4"]
+    cmd.append(str(playlist))
+    return ejecutar_ffmpeg(cmd, src, timeout) and playlist.exists()
+
+
+def gen_poster(src: Path, dest: Path, width: int = 1280) -> bool: # Definimos la función que extrae un frame representativo del video como poster
+    cmd = ['ffmpeg', '-y', '-i', str(src), '-vf', f"thumbnail,scale='min({width},iw)':-2", '-frames:v', '1', '-q:v', '3', str(dest)]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        return dest.exists()
+    except Exception:
+        return False
 
-def procesar_assets(input_dir: Path, output_dir: Path, formats: List[str], sizes: List[int], video_presets: List[Tuple[str, str]], workers: int, dry_run: bool, keep_larger: bool) -> Dict:
+
+def generar_vid_hls(input_root: Path, output_root: Path, src: Path, ladder: List[Tuple[int, int]], segment_type: str = 'fmp4', segment_time: int = 4, keep_larger: bool = False, timeout: Optional[int] = None, workers: int = 1) -> ReporteAssets: # Definimos la función que genera la escalera HLS (rendiciones + master playlist + poster)
+    orig_size = src.stat().st_size
+    src_w, src_h = obtener_dimensiones(src)
+    rel = src.relative_to(input_root)
+    out_dir = output_root / rel.parent / (rel.stem + '_hls')
+    if not ffmpeg_disponible():
+        return ReporteAssets(original_path=str(src), original_size=orig_size, variants=[], width=src_w, height=src_h)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if timeout is None:
+        # Sin timeout explícito se escala con la duración: un video largo en 1080p puede tardar bastante más de 10 minutos
+        duracion = obtener_duracion(src)
+        timeout = max(HLS_TIMEOUT_MINIMO, int(duracion * HLS_TIMEOUT_POR_SEGUNDO)) if duracion else HLS_TIMEOUT_MINIMO
+
+    # No se amplía: se descartan los escalones más altos que el original. Si el original es más bajo
+    # que todos, queda un único escalón a su propia altura con el bitrate del escalón más chico.
+    rungs = sorted(ladder, reverse=True)
+    if src_h:
+        rungs = [r for r in rungs if r[0] <= src_h] or [(src_h - src_h % 2, min(rungs)[1])]
+
+    # Las rendiciones se codifican en paralelo, pero este video ya corre dentro del pool de procesar_assets
+    # (con `workers` hilos) y libx264 usa todos los núcleos: el pool interno se limita a cpu_count / workers.
+    rendiciones = []
+    hilos = max(1, min(len(rungs), (os.cpu_count() or 1) // max(1, workers)))
+    with ThreadPoolExecutor(max_workers=hilos) as ex:
+        futures = {ex.submit(conv_rendicion_hls, src, out_dir, f"{h}p", h, kbps, segment_type, segment_time, timeout): (h, kbps) for h, kbps in rungs}
+        for fut in as_completed(futures):
+            h, kbps = futures[fut]
+            try:
+                ok = fut.result()
+            except Exception as e:
+                print(f"Error generando la rendición {h}p de {src}:", e)
+                ok = False
+            files = list(out_dir.glob(f"{h}p.m3u8")) + list(out_dir.glob(f"{h}p_*"))
+            size = sum(f.stat().st_size for f in files)
+            # Igual que con las demás variantes: solo se conservan los escalones más chicos que el original
+            if not ok or (not keep_larger and size >= orig_size):
+                for f in files:
+                    try:
+                        f.unlink()
+                    except Exception:
+                        pass
+                continue
+            w = round(src_w * h / src_h / 2) * 2 if src_w and src_h else None
+            rendiciones.append((h, kbps, w, size))
+
+    if not rendiciones:
+        return ReporteAssets(original_path=str(src), original_size=orig_size, variants=[], width=src_w, height=src_h)
+
+    rendiciones.sort(reverse=True)
+    # Solo se anuncia audio (codec y bitrate) si la fuente lo tiene: algunos players se traban esperando una pista inexistente
+    audio = tiene_audio(src)
+    audio_kbps = HLS_AUDIO_KBPS if audio else 0
+    codecs = 'avc1.4d4028,mp4a.40.2' if audio else 'avc1.4d4028'
+    master = out_dir / 'master.m3u8'
+    lines = ['#EXTM3U', '#EXT-X-VERSION:7' if segment_type == 'fmp4' else '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for h, kbps, w, _ in rendiciones:
+        bandwidth = (int(kbps * 1.07) + audio_kbps) * 1000
+        resolution = f",RESOLUTION={w}x{h}" if w else ''
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},AVERAGE-BANDWIDTH={(kbps + audio_kbps) * 1000}{resolution},CODECS="{codecs}"')
+        lines.append(f"{h}p.m3u8")
+    master.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    poster = out_dir / 'poster.jpg'
+    poster_path = str(poster) if gen_poster(src, poster) else None
+
+    # En el reporte la escalera cuenta como una variante: el tamaño es el del escalón más alto,
+    # que es lo que descarga un cliente con buena conexión (comparable a un MP4 progresivo).
+    top_h, _, top_w, top_size = rendiciones[0]
+    variants = [VarianteOptimizada(path=str(master), format='hls', width=top_w, size=top_size)]
+    return ReporteAssets(original_path=str(src), original_size=orig_size, variants=variants, width=src_w, height=src_h, poster=poster_path)
+
+
+def gen_var_vid(input_root: Path, output_root: Path, src: Path, presets: List[Tuple[str, str]], video_mode: str, ladder: List[Tuple[int, int]], segment_type: str, keep_larger: bool = False, workers: int = 1, hls_timeout: Optional[int] = None) -> ReporteAssets: # Definimos la función que combina las salidas de video según el modo elegido
+    if video_mode == 'progressive':
+        return generar_vid_var(input_root, output_root, src, presets, keep_larger)
+    rep = generar_vid_hls(input_root, output_root, src, ladder, segment_type, keep_larger=keep_larger, timeout=hls_timeout, workers=workers)
+    if video_mode == 'both':
+        # La versión progresiva sirve de fallback para navegadores sin soporte nativo de HLS
+        rep.variants += generar_vid_var(input_root, output_root, src, presets, keep_larger).variants
+    return rep
+
+
+def procesar_assets(input_dir: Path, output_dir: Path, formats: List[str], sizes: List[int], video_presets: List[Tuple[str, str]], workers: int, dry_run: bool, keep_larger: bool, video_mode: str = 'progressive', hls_ladder: Optional[List[Tuple[int, int]]] = None, hls_segment: str = 'fmp4', hls_timeout: Optional[int] = None) -> Dict:
     images, videos = encontrar_assets(input_dir)
     total_jobs = len(images) + len(videos)
     print(f"Found {len(images)} images and {len(videos)} videos (total jobs: {total_jobs})")
@@ -367,7 +727,7 @@ def procesar_assets(input_dir: Path, output_dir: Path, formats: List[str], sizes
             future = ex.submit(gen_var_im, input_dir, output_dir, img, formats, sizes, use_ffmpeg, keep_larger)
             futures.append(future)
         for vid in videos:
-            future = ex.submit(generar_vid_var, input_dir, output_dir, vid, video_presets, keep_larger)
+            future = ex.submit(gen_var_vid, input_dir, output_dir, vid, video_presets, video_mode, hls_ladder or parse_hls_ladder(HLS_LADDER), hls_segment, keep_larger, workers, hls_timeout)
             futures.append(future)
 
         # Mostrar barra de progreso usando tqdm si está disponible; si no, mostramos un contador simple
@@ -416,12 +776,16 @@ def generate_html_snippets(report: Dict, out_path: Path):
     for r in report.get('assets', []):
         orig = r['original_path']
         variants = r['variants']
-        img_variants = [v for v in variants if v['format'].lower() not in ['mp4', 'webm', 'mov', 'avi']]
-        vid_variants = [v for v in variants if v['format'].lower() in ['mp4', 'webm']]
+        img_variants = [v for v in variants if v['format'].lower() not in ['mp4', 'webm', 'mov', 'avi', 'hls']]
+        vid_variants = [v for v in variants if v['format'].lower() in MIME_VIDEOS]
         if img_variants:
             by_format: Dict[str, List[Dict]] = {}
             for v in img_variants:
                 by_format.setdefault(v['format'].lower(), []).append(v)
+            # La variante 'original' no es un <source>: es el <img> de fallback en el formato de la fuente
+            originales = by_format.pop('original', [])
+            if not by_format:
+                by_format['original'] = originales
             preferred = 'webp' if 'webp' in by_format else list(by_format.keys())[0]
             srcset_items = []
             for v in sorted(by_format.get(preferred, []), key=lambda x: (x['width'] or 9999)):
@@ -433,17 +797,32 @@ def generate_html_snippets(report: Dict, out_path: Path):
             srcset = ', '.join(srcset_items)
             lines.append('<picture>')
             for fmt, items in by_format.items():
+                if fmt == 'original':
+                    continue
                 src = os.path.relpath(items[-1]['path'])
                 lines.append(f"  <source type=\"image/{fmt}\" srcset=\"{srcset}\">")
-            fallback = os.path.relpath(img_variants[0]['path'])
+            if originales:
+                # Sin la variante a tamaño completo el fallback es el archivo fuente, no la reducida más ancha
+                completo = next((v for v in originales if v['width'] is None), None)
+                respaldo = completo['path'] if completo else orig
+                fallback = os.path.relpath(respaldo)
+                srcset = srcset_variantes(originales, r.get('width'), os.path.relpath, respaldo)
+            else:
+                fallback = os.path.relpath(img_variants[0]['path'])
             lines.append(f"  <img src=\"{fallback}\" srcset=\"{srcset}\" loading=\"lazy\" alt=\"Optimized image\">")
             lines.append('</picture>')
         if vid_variants:
-            lines.append('<video controls muted preload="metadata">')
-            for v in vid_variants:
-                rel = os.path.relpath(v['path'])
-                mime = 'video/mp4' if v['format'].lower() == 'mp4' else 'video/webm'
-                lines.append(f"  <source src=\"{rel}\" type=\"{mime}\">")
+            attrs = 'controls muted preload="metadata"'
+            if r.get('poster'):
+                attrs += f" poster=\"{os.path.relpath(r['poster'])}\""
+            if r.get('width') and r.get('height'):
+                attrs += f" width=\"{r['width']}\" height=\"{r['height']}\""
+            lines.append(f'<video {attrs}>')
+            # HLS primero (Safari/iOS lo reproducen nativo); el resto de navegadores cae al MP4/WebM progresivo
+            for fmt, mime in MIME_VIDEOS.items():
+                for v in vid_variants:
+                    if v['format'].lower() == fmt:
+                        lines.append(f"  <source src=\"{os.path.relpath(v['path'])}\" type=\"{mime}\">")
             lines.append('  Tu navegador no soporta el tag.')
             lines.append('</video>')
         lines.append('<hr>')
@@ -452,17 +831,370 @@ def generate_html_snippets(report: Dict, out_path: Path):
         f.write('\n'.join(lines))
 
 
+def clave_indice(p: Path) -> str: # Definimos la clave normalizada con la que se indexan los assets originales
+    return os.path.normcase(str(p.resolve()))
+
+
+def construir_indice_variantes(report: Dict) -> Dict[str, Dict]: # Definimos el índice ruta original -> reporte del asset, para buscar cada referencia en O(1)
+    return {clave_indice(Path(r['original_path'])): r for r in report.get('assets', [])}
+
+
+def srcset_variantes(variants: List[Dict], intrinsic_width: Optional[int], url, respaldo: Optional[str] = None) -> str: # Definimos la función que arma el srcset de un formato con descriptores de ancho
+    # Las variantes más anchas que el original salen con el ancho del original (ffmpeg no amplía), así que
+    # se deduplican por ancho efectivo quedándonos con el archivo más chico.
+    por_ancho: Dict[Optional[int], Dict] = {}
+    for v in variants:
+        w = v['width'] or intrinsic_width
+        if w and intrinsic_width:
+            w = min(w, intrinsic_width)
+        if w not in por_ancho or v['size'] < por_ancho[w]['size']:
+            por_ancho[w] = v
+    if None in por_ancho and len(por_ancho) > 1:
+        del por_ancho[None]
+    # Si la variante a tamaño completo se descartó (no era más chica), el candidato más grande sería una
+    # versión reducida y el navegador la estiraría: se agrega el archivo de respaldo con su ancho intrínseco.
+    if respaldo and intrinsic_width and max((w or 0) for w in por_ancho) < intrinsic_width:
+        por_ancho[intrinsic_width] = {'path': respaldo}
+    items = []
+    for w in sorted(por_ancho, key=lambda x: x or 0):
+        items.append(f"{url(por_ancho[w]['path'])} {w}w" if w else url(por_ancho[w]['path']))
+    return ', '.join(items)
+
+
+def render_tag(tag: str, attrs: List[Tuple[str, Optional[str]]]) -> str: # Definimos la función que serializa un tag de apertura con sus atributos
+    partes = [tag]
+    for k, v in attrs:
+        partes.append(k if v is None else f'{k}="{escape(v, quote=True)}"')
+    return '<' + ' '.join(partes) + '>'
+
+
+def fijar_atributos(attrs: List[Tuple[str, Optional[str]]], forzar: Dict[str, Optional[str]], por_defecto: Dict[str, Optional[str]], quitar: Tuple[str, ...] = ()) -> List[Tuple[str, Optional[str]]]: # Definimos la función que mezcla atributos respetando los que puso el autor de la página
+    presentes = {k for k, _ in attrs}
+    out = [(k, forzar.get(k, v)) for k, v in attrs if k not in quitar]
+    out += [(k, v) for k, v in forzar.items() if k not in presentes and v is not None]
+    out += [(k, v) for k, v in por_defecto.items() if k not in presentes and k not in forzar and v is not None]
+    return out
+
+
+def px(valor: Optional[str]) -> Optional[int]: # Definimos la función que interpreta un largo en píxeles ("300" o "300px"); None si es relativo (%, em, auto...)
+    m = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*(?:px)?\s*', valor or '')
+    return round(float(m.group(1))) if m else None
+
+
+def ancho_css(declaraciones: Optional[str]) -> Optional[int]: # Definimos la función que extrae el width en px de un bloque de declaraciones CSS
+    m = re.search(r'(?:^|;)\s*width\s*:\s*([^;!]+)', declaraciones or '')
+    return px(m.group(1)) if m else None
+
+
+def reglas_css_por_tag(css: str) -> Dict[str, str]: # Definimos la función que junta las declaraciones de las reglas con selector de tipo simple (p.ej. "image { ... }")
+    reglas: Dict[str, str] = {}
+    for selectores, cuerpo in re.findall(r'([^{}]+)\{([^{}]*)\}', css):
+        for sel in selectores.split(','):
+            sel = sel.strip().lower()
+            if re.fullmatch(r'[a-z][a-z0-9-]*', sel):
+                reglas[sel] = (reglas.get(sel, '') + ';' + cuerpo.strip()).strip(';')
+    return reglas
+
+
+def dimensiones_faltantes(attrs: List[Tuple[str, Optional[str]]], width: Optional[int], height: Optional[int]) -> Dict[str, Optional[str]]: # Definimos la función que completa width/height sin deformar lo que puso el autor
+    autor = dict(attrs)
+    if not width or not height:
+        return {}
+    if 'width' not in autor and 'height' not in autor:
+        return {'width': str(width), 'height': str(height)}
+    # Con uno solo de los dos, el otro se calcula con la relación de aspecto intrínseca
+    if 'height' not in autor and px(autor['width']):
+        return {'height': str(round(px(autor['width']) * height / width))}
+    if 'width' not in autor and px(autor['height']):
+        return {'width': str(round(px(autor['height']) * width / height))}
+    return {}
+
+
+def reemplazar_atributo(raw: str, nombre: str, valor: str) -> str: # Definimos la función que cambia el valor de un atributo en el texto original del tag, sin tocar el resto
+    patron = re.compile(r'(\s' + re.escape(nombre) + r'\s*=\s*)("[^"]*"|\'[^\']*\'|[^\s"\'=<>`]+)', re.IGNORECASE)
+    return patron.sub(lambda m: m.group(1) + '"' + escape(valor, quote=True) + '"', raw, count=1)
+
+
+class ReescritorHTML(HTMLParser): # Parser en streaming: copia el HTML tal cual y solo reescribe <img>/<image>/<video> de assets procesados
+    # Tope de caracteres que se retienen después de </head> esperando los medios above-the-fold
+    MAX_RETENIDO = 256 * 1024
+
+    def __init__(self, salida, indice: Dict[str, Dict], page_src: Path, page_out: Path, html_root: Path, above_the_fold: int = 1):
+        super().__init__(convert_charrefs=False)
+        self.salida = salida
+        self.indice = indice
+        self.page_src = page_src
+        self.page_out = page_out
+        self.html_root = html_root
+        self.above_the_fold = above_the_fold
+        self.reescritos = 0
+        self._en_picture = 0
+        self._en_style = False
+        self._style: List[str] = []
+        self._css: Dict[str, str] = {}
+        self._mismo_dir = page_src.parent == page_out.parent
+        self._medios_vistos = 0
+        self._retenido: Optional[List[str]] = None
+        self._len_retenido = 0
+        self._preloads: List[str] = []
+
+    # --- salida -------------------------------------------------------------
+    def _emitir(self, s: str):
+        if self._retenido is None:
+            self.salida.write(s)
+        else:
+            self._retenido.append(s)
+            self._len_retenido += len(s)
+            if self._len_retenido > self.MAX_RETENIDO:
+                self._liberar()
+
+    def _liberar(self): # Inserta los <link rel="preload"> justo antes de </head> y vacía lo retenido
+        if self._retenido is None:
+            return
+        retenido, self._retenido = self._retenido, None
+        for link in self._preloads:
+            self.salida.write(f"  {link}\n")
+        self.salida.write(''.join(retenido))
+
+    def close(self):
+        super().close()
+        self._liberar()
+
+    # --- callbacks del parser ---------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        self._tag(tag, attrs, self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self._tag(tag, attrs, self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag == 'style' and self._en_style:
+            # El contenido de <style> se junta completo para no partir reglas ni url(...) entre chunks
+            self._en_style = False
+            css, self._style = ''.join(self._style), []
+            # Las reglas de tipo (img {...}, image {...}) se usan para respetar el tamaño que da el CSS de la página
+            for sel, decl in reglas_css_por_tag(css).items():
+                self._css[sel] = (self._css.get(sel, '') + ';' + decl).strip(';')
+            self._emitir(self._rebasar_css(css))
+        if tag == 'picture' and self._en_picture:
+            self._en_picture -= 1
+        if tag == 'head' and self.above_the_fold > 0 and self._medios_vistos < self.above_the_fold:
+            # Retenemos desde </head> hasta ver los primeros medios para poder agregar sus preloads al head
+            self._retenido = []
+            self._len_retenido = 0
+        self._emitir(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self._en_style:
+            self._style.append(data)
+            return
+        self._emitir(data)
+
+    def handle_entityref(self, name):
+        self._emitir(f'&{name};')
+
+    def handle_charref(self, name):
+        self._emitir(f'&#{name};')
+
+    def handle_comment(self, data):
+        self._emitir(f'<!--{data}-->')
+
+    def handle_decl(self, decl):
+        self._emitir(f'<!{decl}>')
+
+    def handle_pi(self, data):
+        self._emitir(f'<?{data}>')
+
+    def unknown_decl(self, data):
+        self._emitir(f'<![{data}]>')
+
+    # --- reescritura --------------------------------------------------------
+    def _tag(self, tag: str, attrs, raw: str):
+        if tag == 'style':
+            self._en_style = True
+        if tag == 'picture':
+            self._en_picture += 1
+        # Las URLs relativas se recalculan para la ubicación de la página reescrita; el índice se consulta con las originales
+        rebasados = self._rebasar_atributos(attrs)
+        for (k, v), (_, nuevo) in zip(attrs, rebasados):
+            if nuevo != v:
+                raw = reemplazar_atributo(raw, k, nuevo)
+        if tag not in ('img', 'image', 'video'):
+            self._emitir(raw)
+            return
+        above = self._medios_vistos < self.above_the_fold
+        self._medios_vistos += 1
+        rep = None if self._en_picture else self._buscar(dict(attrs).get('src'))
+        if rep is None:
+            self._emitir(raw)
+        elif tag == 'video':
+            self._emitir(self._video(rebasados, rep, above))
+            self.reescritos += 1
+        else:
+            self._emitir(self._imagen(tag, rebasados, rep, above))
+            self.reescritos += 1
+        if self._retenido is not None and self._medios_vistos >= self.above_the_fold:
+            self._liberar()
+
+    def _buscar(self, src: Optional[str]) -> Optional[Dict]: # Resuelve la referencia de la página contra el índice de originales
+        if not src:
+            return None
+        url = urlsplit(src)
+        if url.scheme or url.netloc or not url.path:
+            return None
+        ruta = unquote(url.path)
+        base = self.html_root if ruta.startswith('/') else self.page_src.parent
+        return self.indice.get(clave_indice(base / ruta.lstrip('/')))
+
+    def _rebasar(self, url: str) -> str: # URL relativa a la página original -> relativa a la página reescrita
+        partes = urlsplit(url)
+        if self._mismo_dir or partes.scheme or partes.netloc or not partes.path or partes.path.startswith('/'):
+            return url
+        nuevo = quote(Path(os.path.relpath(self.page_src.parent / unquote(partes.path), self.page_out.parent)).as_posix(), safe="/@:!$&'()*+;=~")
+        if partes.path.endswith('/'):
+            nuevo += '/'
+        return urlunsplit(('', '', nuevo, partes.query, partes.fragment))
+
+    def _rebasar_srcset(self, valor: str) -> str:
+        if 'data:' in valor:  # las data URLs pueden tener comas; no hay nada que recalcular
+            return valor
+        candidatos = []
+        for c in valor.split(','):
+            url, _, desc = c.strip().partition(' ')
+            if url:
+                candidatos.append(self._rebasar(url) + (' ' + desc.strip() if desc.strip() else ''))
+        return ', '.join(candidatos)
+
+    def _rebasar_css(self, css: str) -> str:
+        if self._mismo_dir:
+            return css
+        return re.sub(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)', lambda m: f"url({m.group(1)}{self._rebasar(m.group(2).strip())}{m.group(1)})", css)
+
+    def _rebasar_atributos(self, attrs):
+        if self._mismo_dir:
+            return list(attrs)
+        out = []
+        for k, v in attrs:
+            if v is not None and k in ATRIBUTOS_URL:
+                if k in ('srcset', 'imagesrcset'):
+                    v = self._rebasar_srcset(v)
+                elif k == 'style':
+                    v = self._rebasar_css(v)
+                else:
+                    v = self._rebasar(v)
+            out.append((k, v))
+        return out
+
+    def _url(self, path: str) -> str: # Ruta del asset relativa a la página reescrita
+        return quote(Path(os.path.relpath(path, self.page_out.parent)).as_posix())
+
+    def _imagen(self, tag: str, attrs, rep: Dict, above: bool) -> str:
+        width, height = rep.get('width'), rep.get('height')
+        autor = dict(attrs)
+        css = self._css.get(tag)
+        if tag == 'image' and css:
+            # <image> pasa a <img>: la regla "image { ... }" de la página deja de aplicar, así que se
+            # copia inline (antes del style del autor, que sigue ganando) para que el render no cambie.
+            estilo = css if not autor.get('style') else css + ';' + autor['style']
+            attrs = [(k, v) for k, v in attrs if k != 'style'] + [('style', estilo)]
+            autor['style'] = estilo
+        # sizes: el del autor; si no, el ancho con el que se muestra (atributo, style o CSS); el intrínseco como último recurso
+        slot = px(autor.get('width')) or ancho_css(autor.get('style')) or ancho_css(css) or width
+        sizes = autor.get('sizes') or (f"(max-width: {slot}px) 100vw, {slot}px" if slot else '100vw')
+        hints = {'loading': 'eager' if above else 'lazy', 'decoding': 'async', 'fetchpriority': 'high' if above else None}
+        dims = dimensiones_faltantes(attrs, width, height)
+
+        by_format: Dict[str, List[Dict]] = {}
+        for v in rep['variants']:
+            if v['format'].lower() in MIME_IMAGENES or v['format'].lower() == 'original':
+                by_format.setdefault(v['format'].lower(), []).append(v)
+        # El <img> apunta a la variante 'original' a tamaño completo si existe; si no (p.ej. sin jpegtran), al
+        # archivo fuente, nunca a una reducida. Las reducidas van al srcset con ese respaldo como candidato mayor.
+        originales = by_format.pop('original', [])
+        completo = next((v for v in originales if v['width'] is None), None)
+        respaldo = completo['path'] if completo else rep['original_path']
+        forzar = {'src': self._url(respaldo)}
+        if any(v['width'] for v in originales):
+            forzar.update({'srcset': srcset_variantes(originales, width, self._url, respaldo), 'sizes': sizes})
+        img = render_tag('img', fijar_atributos(attrs, forzar, {**dims, **hints}))
+        if not by_format:
+            return img
+        lines = ['<picture>']
+        precargada = False
+        for fmt, mime in MIME_IMAGENES.items():
+            if fmt not in by_format:
+                continue
+            srcset = srcset_variantes(by_format[fmt], width, self._url, respaldo)
+            lines.append(render_tag('source', [('type', mime), ('srcset', srcset), ('sizes', sizes)]))
+            if above and not precargada and self._retenido is not None and len(self._preloads) < self.above_the_fold:
+                # Solo precargamos el formato preferido (uno por imagen); los navegadores que no lo soportan ignoran el preload por su type
+                precargada = True
+                self._preloads.append(render_tag('link', [('rel', 'preload'), ('as', 'image'), ('type', mime), ('imagesrcset', srcset), ('imagesizes', sizes), ('fetchpriority', 'high')]))
+        lines.append(img)
+        lines.append('</picture>')
+        return ''.join(lines)
+
+    def _video(self, attrs, rep: Dict, above: bool) -> str:
+        width, height = rep.get('width'), rep.get('height')
+        defaults = {**dimensiones_faltantes(attrs, width, height), 'preload': 'metadata' if above else 'none'}
+        if rep.get('poster'):
+            defaults['poster'] = self._url(rep['poster'])
+            if above and self._retenido is not None and len(self._preloads) < self.above_the_fold:
+                self._preloads.append(render_tag('link', [('rel', 'preload'), ('as', 'image'), ('href', defaults['poster']), ('fetchpriority', 'high')]))
+        vid_variants = [v for v in rep['variants'] if v['format'].lower() in MIME_VIDEOS]
+        if not vid_variants:
+            return render_tag('video', fijar_atributos(attrs, {'src': self._url(rep['original_path'])}, defaults))
+        out = render_tag('video', fijar_atributos(attrs, {}, defaults, quitar=('src',)))
+        for fmt, mime in MIME_VIDEOS.items():
+            for v in vid_variants:
+                if v['format'].lower() == fmt:
+                    out += render_tag('source', [('src', self._url(v['path'])), ('type', mime)])
+        return out
+
+
+def reescribir_html(report: Dict, html_dir: Path, html_out: Path, above_the_fold: int = 1, chunk_size: int = 64 * 1024) -> Dict: # Definimos la pasada que reescribe todas las páginas HTML del directorio
+    indice = construir_indice_variantes(report)
+    pages = [p for p in html_dir.rglob('*') if p.is_file() and p.suffix.lower() in HTML_EXTS]
+    if html_out != html_dir:
+        # No volver a procesar páginas que ya son salida (p.ej. snippets.html)
+        pages = [p for p in pages if html_out not in p.parents]
+    total_reescritos = 0
+    for page in pages:
+        out = html_out / page.relative_to(html_dir)
+        asegurar_dir(out)
+        tmp = out.with_name(out.name + '.tmp')
+        with open(page, 'r', encoding='utf-8', errors='surrogateescape', newline='') as fin, \
+                open(tmp, 'w', encoding='utf-8', errors='surrogateescape', newline='') as fout:
+            parser = ReescritorHTML(fout, indice, page.resolve(), out.resolve(), html_dir.resolve(), above_the_fold)
+            while True:
+                chunk = fin.read(chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            parser.close()
+        os.replace(tmp, out)
+        total_reescritos += parser.reescritos
+    return {'pages': len(pages), 'rewritten_tags': total_reescritos}
+
+
 def parse_args():
     p = argparse.ArgumentParser(description='Optimizador automático de assets web')
     p.add_argument('--input', '--input-dir', dest='input', required=True, help='Directorio con assets')
     p.add_argument('--output', '--output-dir', dest='output', required=False, default=None, help='Directorio de salida (por defecto: <input>_optimized)')
-    p.add_argument('--formats', dest='formats', default='webp,avif', help='Formatos a generar (csv) e.g. webp,avif')
+    p.add_argument('--formats', dest='formats', default='webp,avif,original', help='Formatos a generar (csv) e.g. webp,avif,original (original = mismo formato de la fuente, reoptimizado)')
     p.add_argument('--sizes', dest='sizes', default='320,640,1280', help='Anchuras responsive a generar (csv)')
     p.add_argument('--video-presets', dest='video_presets', default='mp4:.mp4,webm:.webm', help='video presets como suffix:ext separados por coma, e.g. -mp4:.mp4,-webm:.webm')
+    p.add_argument('--video-mode', dest='video_mode', choices=['progressive', 'hls', 'both'], default='progressive', help='Salida de video: MP4/WebM progresivo, escalera HLS o ambas')
+    p.add_argument('--hls-ladder', dest='hls_ladder', default=HLS_LADDER, help='Escalera HLS como alto:kbps separados por coma, e.g. 720:2800,360:800')
+    p.add_argument('--hls-segment', dest='hls_segment', choices=['fmp4', 'ts'], default='fmp4', help='Tipo de segmento HLS')
+    p.add_argument('--hls-timeout', dest='hls_timeout', type=int, default=None, help=f'Segundos máximos por rendición HLS (por defecto: {HLS_TIMEOUT_POR_SEGUNDO}x la duración del video, mínimo {HLS_TIMEOUT_MINIMO})')
     p.add_argument('--workers', dest='workers', type=int, default=4, help='Hilos para conversión')
     p.add_argument('--dry-run', dest='dry_run', action='store_true', help='No escribe archivos, solo simula (evalúa paths)')
     p.add_argument('--keep-larger', dest='keep_larger', action='store_true', help='Conservar variantes generadas aunque sean más grandes que el original')
     p.add_argument('--report', dest='report', default='report.json', help='Ruta al archivo JSON de informe')
+    p.add_argument('--html-dir', dest='html_dir', default=None, help='Directorio con páginas HTML a reescribir con las variantes generadas')
+    p.add_argument('--html-output', dest='html_output', default=None, help='Directorio de salida de las páginas reescritas (por defecto: el de salida)')
+    p.add_argument('--above-the-fold', dest='above_the_fold', type=int, default=1, help='Cantidad de medios por página que se cargan con prioridad (sin lazy, con preload)')
     return p.parse_args()
 
 
@@ -475,6 +1207,15 @@ def parse_video_presets(s: str) -> List[Tuple[str, str]]:
     return out
 
 
+def parse_hls_ladder(s: str) -> List[Tuple[int, int]]:
+    out = []
+    for part in s.split(','):
+        if ':' in part:
+            height, kbps = part.split(':', 1)
+            out.append((int(height), int(kbps)))
+    return out
+
+
 def main():
     args = parse_args()
     input_dir = Path(args.input).resolve()
@@ -485,14 +1226,20 @@ def main():
     formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
     sizes = [int(x) for x in args.sizes.split(',') if x.strip()]
     video_presets = parse_video_presets(args.video_presets)
+    hls_ladder = parse_hls_ladder(args.hls_ladder)
 
     print(f"Entrada: {input_dir}\nSalida: {output_dir}\nFormatos: {formats}\nTamaños: {sizes}\nVideo presets: {video_presets}")
 
-    report = procesar_assets(input_dir, output_dir, formats, sizes, video_presets, args.workers, args.dry_run, args.keep_larger)
+    report = procesar_assets(input_dir, output_dir, formats, sizes, video_presets, args.workers, args.dry_run, args.keep_larger, args.video_mode, hls_ladder, args.hls_segment, args.hls_timeout)
     guardar_reporte(report, Path(args.report))
     generate_html_snippets(report, output_dir / 'snippets.html')
     print("Reporte guardado en", args.report)
     print("Snippets guardados en", str(output_dir / 'snippets.html'))
+    if args.html_dir:
+        html_dir = Path(args.html_dir).resolve()
+        html_out = Path(args.html_output).resolve() if args.html_output else output_dir
+        stats = reescribir_html(report, html_dir, html_out, args.above_the_fold)
+        print(f"Páginas reescritas: {stats['pages']} ({stats['rewritten_tags']} tags) en {html_out}")
     print(f"Total original: {human(report['total_original_bytes'])}")
     print(f"Total final: {human(report['total_final_bytes'])}")
     print(f"Saved: {human(report['total_saved_bytes'])} ({report['percent_reduction']:.2f}%)")
@@ -0,0 +1,194 @@
+"""PSEUDOCODIGO
+ACCION evaluarRango es
+  AMBIENTE
+    desde, hasta, bloque, inicio: entero
+    nums, cumplen: arreglo de entero
+  PROCESO
+    Para inicio := desde hasta hasta con paso bloque hacer:
+      nums := [inicio, ..., min(inicio + bloque, hasta) - 1]
+      miles := nums DIV(1000)
+      centenas := (nums DIV(100)) MOD(10)
+      decenas := (nums DIV(10)) MOD(10)
+      unidades := nums MOD(10)
+      cumplen := los nums donde (miles + centenas) = (decenas + unidades)
+      escribir(cumplen)
+    Fin Para
+Fin ACCION
+
+Versión por bloques de los ejercicios de descomposición en dígitos (tp3.descomposicionNum y
+tp6.multiplos11). En vez de tratar un número por vez, cada bloque se descompone con aritmética
+entera de NumPy (// y %) sobre arreglos enteros. Los resultados se devuelven por bloque o se
+escriben a un archivo, sin un print por número.
+
+multiplos11 conserva la cuenta de tp6 y por eso solo acepta números de 4 cifras; divisible11 usa
+la suma alternada de dígitos (el criterio real de divisibilidad por 11) y sirve para cualquier rango.
+
+Uso:
+  python rangos_digitos.py --desde 1000 --hasta 10000 --predicado multiplos11
+  python rangos_digitos.py --desde 0 --hasta 300000000 --predicado multiplo3 --salida multiplos3.txt
+  python rangos_digitos.py --desde 0 --hasta 10000000 --predicado divisible11 --benchmark
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+BLOQUE = 1 << 21
+
+
+def suma_digitos(nums):
+  # Suma de dígitos de todo el arreglo: una vuelta por dígito, no por número
+  nums = np.abs(nums)
+  suma = np.zeros_like(nums)
+  while nums.any():
+    suma += nums % 10
+    nums = nums // 10
+  return suma
+
+
+def suma_alternada(nums):
+  # Suma alternada de dígitos desde las unidades (+u -d +c -m ...): n es múltiplo de 11 si y solo si ella lo es
+  nums = np.abs(nums)
+  suma = np.zeros_like(nums)
+  signo = 1
+  while nums.any():
+    suma += signo * (nums % 10)
+    nums = nums // 10
+    signo = -signo
+  return suma
+
+
+def multiplos11(nums):
+  # Misma descomposición que tp6.multiplos11, con división entera en lugar de float.
+  # Solo tiene sentido para números de 4 cifras: fuera de ese rango "miles" deja de ser un dígito.
+  if nums.size and (nums.min() < 1000 or nums.max() > 9999):
+    raise ValueError("multiplos11 solo admite números de 1000 a 9999; para otros rangos usar divisible11")
+  miles = nums // 1000
+  centenas = (nums // 100) % 10
+  decenas = (nums // 10) % 10
+  unidades = nums % 10
+  return (miles + centenas) == (decenas + unidades)
+
+
+def divisible11(nums):
+  # Criterio de divisibilidad por 11 válido para cualquier entero
+  return suma_alternada(nums) % 11 == 0
+
+
+def multiplo3(nums):
+  # Criterio de divisibilidad de tp3.descomposicionNum: la suma de los dígitos es múltiplo de 3
+  return suma_digitos(nums) % 3 == 0
+
+
+def multiplos11_escalar(num):
+  if not 1000 <= num <= 9999:
+    raise ValueError("multiplos11 solo admite números de 1000 a 9999; para otros rangos usar divisible11")
+  miles = num // 1000
+  centenas = (num // 100) % 10
+  decenas = (num // 10) % 10
+  unidades = num % 10
+  return (miles + centenas) == (decenas + unidades)
+
+
+def divisible11_escalar(num):
+  num = abs(num)
+  suma = 0
+  signo = 1
+  while num:
+    suma += signo * (num % 10)
+    num //= 10
+    signo = -signo
+  return suma % 11 == 0
+
+
+def multiplo3_escalar(num):
+  num = abs(num)
+  suma = 0
+  while num:
+    suma += num % 10
+    num //= 10
+  return suma % 3 == 0
+
+
+PREDICADOS = {
+  "multiplos11": (multiplos11, multiplos11_escalar),
+  "divisible11": (divisible11, divisible11_escalar),
+  "multiplo3": (multiplo3, multiplo3_escalar),
+}
+
+
+def evaluarRango(desde, hasta, predicado, bloque=BLOQUE):
+  # Generador: devuelve, bloque por bloque, los números de [desde, hasta) que cumplen el predicado
+  for inicio in range(desde, hasta, bloque):
+    nums = np.arange(inicio, min(inicio + bloque, hasta), dtype=np.int64)
+    cumplen = nums[predicado(nums)]
+    if cumplen.size:
+      yield cumplen
+
+
+def guardarRango(desde, hasta, predicado, ruta, bloque=BLOQUE, binario=False):
+  # Escribe los resultados al archivo a medida que salen, con una sola escritura por bloque; devuelve cuántos hubo.
+  # En texto va un número por línea; en binario, int64 crudos (se leen con np.fromfile(ruta, dtype=np.int64)).
+  total = 0
+  with open(ruta, "wb" if binario else "w") as f:
+    for cumplen in evaluarRango(desde, hasta, predicado, bloque):
+      if binario:
+        cumplen.tofile(f)
+      else:
+        f.write("\n".join(map(str, cumplen.tolist())) + "\n")
+      total += cumplen.size
+  return total
+
+
+def evaluarRangoEscalar(desde, hasta, predicado):
+  return [num for num in range(desde, hasta) if predicado(num)]
+
+
+def benchmark(desde, hasta, nombre, bloque=BLOQUE):
+  vectorial, escalar = PREDICADOS[nombre]
+  t0 = time.perf_counter()
+  resultado_escalar = evaluarRangoEscalar(desde, hasta, escalar)
+  t_escalar = time.perf_counter() - t0
+  t0 = time.perf_counter()
+  bloques = list(evaluarRango(desde, hasta, vectorial, bloque))
+  resultado_vectorial = np.concatenate(bloques) if bloques else np.empty(0, dtype=np.int64)
+  t_vectorial = time.perf_counter() - t0
+  if resultado_vectorial.tolist() != resultado_escalar:
+    raise AssertionError("Los resultados escalares y vectoriales no coinciden")
+  print("Rango [", desde, ",", hasta, ") con", nombre, ":", len(resultado_escalar), "números cumplen")
+  print("Escalar:   %.3f s" % t_escalar)
+  print("Vectorial: %.3f s (x%.1f)" % (t_vectorial, t_escalar / t_vectorial if t_vectorial else float("inf")))
+
+
+def main():
+  p = argparse.ArgumentParser(description="Evalúa los predicados de dígitos sobre rangos de enteros por bloques")
+  p.add_argument("--desde", type=int, default=1000)
+  p.add_argument("--hasta", type=int, default=10000, help="Límite superior (excluido), como range()")
+  p.add_argument("--predicado", choices=sorted(PREDICADOS), default="multiplos11")
+  p.add_argument("--bloque", type=int, default=BLOQUE, help="Cantidad de números por bloque")
+  p.add_argument("--salida", default=None, help="Archivo donde escribir los números que cumplen")
+  p.add_argument("--binario", action="store_true", help="Con --salida, escribe int64 crudos en vez de texto")
+  p.add_argument("--benchmark", action="store_true", help="Compara el motor por bloques con el bucle escalar")
+  args = p.parse_args()
+
+  # Se valida antes de empezar: un error a mitad del rango dejaría el archivo de salida truncado
+  if args.bloque <= 0:
+    p.error("--bloque debe ser mayor que 0")
+  if args.hasta <= args.desde:
+    p.error("--hasta debe ser mayor que --desde")
+  if args.predicado == "multiplos11" and (args.desde < 1000 or args.hasta > 10000):
+    p.error("multiplos11 solo admite números de 1000 a 9999 (--desde >= 1000, --hasta <= 10000); para otros rangos usar divisible11")
+
+  if args.benchmark:
+    benchmark(args.desde, args.hasta, args.predicado, args.bloque)
+  elif args.salida:
+    total = guardarRango(args.desde, args.hasta, PREDICADOS[args.predicado][0], args.salida, args.bloque, args.binario)
+    print(total, "números guardados en", args.salida)
+  else:
+    for cumplen in evaluarRango(args.desde, args.hasta, PREDICADOS[args.predicado][0], args.bloque):
+      print("\n".join(map(str, cumplen.tolist())))
+
+
+if __name__ == "__main__":
+  main()